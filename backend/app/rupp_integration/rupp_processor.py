@@ -3,145 +3,208 @@ Fixed Enhanced RUPP Template-based SNL Generator
 Clean version with proper actor identification
 """
 
-import spacy
 import re
-import textacy
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+
+# Precompiled patterns shared by every processor instance
+_SENTENCE_TERMINATOR_RE = re.compile(r'[.?!]\s+')
+# Terminators closing an initialism ("e.g.") or a title ("Mr.") do not end a sentence
+_ABBREVIATION_TAIL_RE = re.compile(r'(?:\w\.\w.|[A-Z][a-z]\.)\Z')
+_DISALLOWED_CHARS_RE = re.compile(r'[^\w\s\.,\-]')
+# The same deletion as a str.translate table, for text that is pure ASCII
+_DISALLOWED_ASCII = str.maketrans(dict.fromkeys(
+    char for char in map(chr, range(128)) if _DISALLOWED_CHARS_RE.match(char)))
+_SYSTEM_MODAL_PREFIX_RE = re.compile(r'^(the )?system (shall|should|will|can)')
+_SYSTEM_MENTION_RE = re.compile(r'(the )?system')
+_ACTOR_PREFIX_RE = re.compile(r'^the (system|member|user|librarian|administrator|guest)')
+_VERB_ARTIFACT_PREFIX_RE = re.compile(r'^(s\s|ing\s)')
+_PADDED_THE_PREFIX_RE = re.compile(r'^\s*the\s+')
+_THE_PREFIX_RE = re.compile(r'^the\s+')
+_MODAL_PREFIX_RE = re.compile(r'^(can|will|should|must|may)\s+')
+_USER_VERB_PREFIX_RE = re.compile(r'^(click|enter|select|type|view|browse)s?\s+')
+_THE_SYSTEM_PREFIX_RE = re.compile(r'^(the\s+)?(system\s+)?')
+
+# The only actors the processor reports; "admin" is folded into "administrator"
+_VALID_ACTORS = frozenset({'system', 'user', 'member', 'librarian', 'administrator', 'guest'})
+
+# Keyword buckets used when splitting compound sentences and choosing templates.
+# They are plain alternations, so a search matches exactly like a substring test.
+_COMPOUND_VERB_RE = re.compile('clicks|enters|displays|shows|checks|validates|asks|opens|closes|'
+                               'selects|returns|issues|reserves|adds|removes|updates|stores|'
+                               'retrieves|prompts')
+_AND_SPLIT_RE = re.compile(r'\s+and\s+', re.IGNORECASE)
+# Subject carried over to 'and' fragments; earlier entries win when several are mentioned
+_SUBJECTS = ('system', 'member', 'user', 'librarian', 'administrator', 'guest')
+_SUBJECT_RANK = {subject: rank for rank, subject in enumerate(_SUBJECTS)}
+_SUBJECT_RE = re.compile('(?=(' + '|'.join(_SUBJECTS) + '))')
+_SKIP_PHRASE_RE = re.compile('the details include|details include|include the total|'
+                             'total number of|date of issue|return date|fine to be paid')
+
+# Keyword-driven templates in priority order; the first bucket that matches picks the template.
+# A search per bucket stops at the first hit, which is cheaper than scanning for all of them.
+_KEYWORD_TEMPLATES = (
+    ('capability', re.compile('display|show|validate|process|store|retrieve|calculate|generate|'
+                              'check|ask|prompt|open|close|update|enter|select')),
+    ('user_action', re.compile('click|enter|select|view|browse|search')),
+    ('modal', re.compile('should|must|can|will|shall|may')),
+    ('feature', re.compile('feature|function|capability|service')),
+    ('state', re.compile('available|ready|logged in|valid|correct')),
+    ('validation', re.compile('validate|check|verify|confirm')),
+)
+
+# Capability verb variants mapped to the base verb used in the generated requirement.
+# Order matters: when several variants occur, the one listed first is used.
+_ACTION_VERBS = {
+    'displays': 'display', 'display': 'display', 'shows': 'display', 'show': 'display',
+    'validates': 'validate', 'validate': 'validate', 'checks': 'validate', 'check': 'validate',
+    'processes': 'process', 'process': 'process', 'handles': 'process', 'handle': 'process',
+    'stores': 'store', 'store': 'store', 'saves': 'store', 'save': 'store',
+    'retrieves': 'retrieve', 'retrieve': 'retrieve', 'fetches': 'retrieve', 'fetch': 'retrieve',
+    'asks': 'ask', 'ask': 'ask', 'prompts': 'prompt', 'prompt': 'prompt',
+    'opens': 'open', 'open': 'open', 'closes': 'close', 'close': 'close',
+    'updates': 'update', 'update': 'update', 'enters': 'accept', 'enter': 'accept'
+}
+
+# Template word lists, checked in order so the first listed word wins
+_MODALS = ('should', 'must', 'can', 'will', 'shall', 'may', 'could', 'would')
+_FEATURE_WORDS = ('feature', 'function', 'capability', 'service', 'interface', 'component')
+_STATE_WORDS = ('available', 'ready', 'logged in', 'valid', 'correct', 'stored', 'retrieved')
+_VALIDATION_WORDS = ('validate', 'check', 'verify', 'confirm', 'authenticate')
+# Objects that take a definite article in user action requirements
+_ARTICLE_NOUNS = ('button', 'page', 'details', 'information', 'books')
+
+# Common contractions expanded in a single pass during preprocessing (none contains another)
+_CONTRACTIONS = {
+    "can't": "cannot", "won't": "will not", "don't": "do not",
+    "isn't": "is not", "aren't": "are not", "wasn't": "was not",
+    "weren't": "were not", "haven't": "have not", "hasn't": "has not",
+    "wouldn't": "would not", "shouldn't": "should not", "couldn't": "could not"
+}
+_CONTRACTION_RE = re.compile("|".join(map(re.escape, _CONTRACTIONS)))
+
+def _expand_contraction(match: re.Match) -> str:
+    return _CONTRACTIONS[match.group(0)]
+
+@lru_cache(maxsize=1024)
+def _preprocess(text: str) -> str:
+    """Complete preprocessing pipeline (cached, the result is an immutable str)"""
+    # Basic text cleaning
+    text = text.lower()
+    if "&" in text:  # the membership probe is far cheaper than a no-op replace
+        text = text.replace("&", "and")
+    
+    # Expand common contractions (every one of them ends in "n't")
+    if "n't" in text:
+        text = _CONTRACTION_RE.sub(_expand_contraction, text)
+    
+    # Remove excessive punctuation but keep periods
+    if text.isascii():  # one C-level table lookup per character
+        text = text.translate(_DISALLOWED_ASCII)
+    else:
+        text = _DISALLOWED_CHARS_RE.sub('', text)
+    
+    # Clean up whitespace (split() also drops leading and trailing runs)
+    return ' '.join(text.split())
+
+@lru_cache(maxsize=64)
+def _actor_mention_re(actors: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """Alternation over the non-system actors, so one search answers 'is any actor mentioned'"""
+    others = [re.escape(actor) for actor in actors if actor != 'system']
+    return re.compile('|'.join(others)) if others else None
+
+def _mentions_actor(sentence_lower: str, actors: List[str]) -> bool:
+    """True when a non-system actor appears anywhere in the lowered sentence"""
+    pattern = _actor_mention_re(tuple(actors))
+    return pattern is not None and pattern.search(sentence_lower) is not None
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a result dict one level deep, so shared results can be handed out safely"""
+    return {key: value.copy() if isinstance(value, (list, dict)) else value
+            for key, value in result.items()}
+
+# Template handlers keyed by _match_template_category results; the processor is passed in
+_TEMPLATE_HANDLERS = {
+    'conditional': lambda processor, sentence, lower, actors: processor.process_conditional_template(sentence, lower),
+    'when': lambda processor, sentence, lower, actors: processor.process_when_template(sentence),
+    'capability': lambda processor, sentence, lower, actors: processor.process_system_capability_template(sentence, lower),
+    'user_action': lambda processor, sentence, lower, actors: processor.process_user_action_template(sentence, lower, actors),
+    'modal': lambda processor, sentence, lower, actors: processor.process_modal_template(sentence, lower),
+    'feature': lambda processor, sentence, lower, actors: processor.process_feature_template(sentence, lower),
+    'state': lambda processor, sentence, lower, actors: processor.process_state_template(sentence, lower),
+    'validation': lambda processor, sentence, lower, actors: processor.process_validation_template(sentence, lower),
+    'default': lambda processor, sentence, lower, actors: processor.process_default_template(sentence, lower, actors),
+}
 
 class FixedRUPPProcessor:
     def __init__(self):
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-        except OSError:
-            # Fallback to basic processing if spaCy model not available
-            self.nlp = None
-        
-        self.corrections = {
-            'librarian': 'NOUN',
-        }
-        self.abbreviation_mapping = {
-            'guest user': 'guest_user',
-            'into': 'in to'
-        }
+        # The templates are purely regex based, so no spaCy pipeline is loaded here
+        pass
         
+    def _split_sentence_boundaries(self, text: str) -> List[str]:
+        """Split text after sentence terminators, skipping abbreviation periods"""
+        sentences = []
+        start = 0
+        for match in _SENTENCE_TERMINATOR_RE.finditer(text):
+            end = match.start() + 1
+            if _ABBREVIATION_TAIL_RE.search(text, max(0, end - 4), end):
+                continue
+            sentences.append(text[start:end])
+            start = match.end()
+        sentences.append(text[start:])
+        return sentences
+
     def split_into_sentences(self, paragraph: str) -> str:
         """Split the paragraph into sentences using regular expressions"""
-        sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|\!)\s+', paragraph)
-        formatted_sentences = []
-        
-        for i, sentence in enumerate(sentences, start=1):
-            sentence = sentence.strip()
-            if sentence and len(sentence) > 3:
-                formatted_sentences.append(f"{i}. {sentence}")
-        
-        return '\n'.join(formatted_sentences)
+        sentences = (sentence.strip() for sentence in self._split_sentence_boundaries(paragraph))
+        # Numbering counts every piece, including the short ones that are skipped
+        return '\n'.join(f"{i}. {sentence}" for i, sentence in enumerate(sentences, start=1)
+                         if len(sentence) > 3)
     
     def apply_preprocessing(self, text: str) -> str:
-        """Apply complete preprocessing pipeline"""
-        # Basic text cleaning
-        text = text.lower()
-        text = text.replace("&", "and")
-        
-        # Expand common contractions
-        contractions = {
-            "can't": "cannot", "won't": "will not", "don't": "do not",
-            "isn't": "is not", "aren't": "are not", "wasn't": "was not",
-            "weren't": "were not", "haven't": "have not", "hasn't": "has not",
-            "wouldn't": "would not", "shouldn't": "should not", "couldn't": "could not"
-        }
-        
-        for contraction, expansion in contractions.items():
-            text = text.replace(contraction, expansion)
-        
-        # Remove excessive punctuation but keep periods
-        text = re.sub(r'[^\w\s\.,\-]', '', text)
-        
-        # Clean up whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        """Apply complete preprocessing pipeline, see _preprocess"""
+        return _preprocess(text)
 
     def identify_actors_enhanced(self, description: str) -> List[str]:
         """Enhanced actor identification - ONLY valid human actors"""
-        actors = set()
-        
-        # STRICT list of valid actors only
-        valid_actors = {'system', 'user', 'administrator', 'librarian', 'member', 'guest'}
-        
-        # Extract words and check against valid actors only
-        words = description.lower().split()
-        for word in words:
-            clean_word = re.sub(r'[^a-z]', '', word)
-            if clean_word in valid_actors:
-                actors.add(clean_word)
-        
-        # Direct keyword mapping
+        # STRICT list of valid actors only, matched as substrings so plurals count too.
+        # A few C-level substring probes beat one regex scan over the whole text
         text_lower = description.lower()
-        if 'system' in text_lower:
-            actors.add('system')
-        if 'user' in text_lower:
-            actors.add('user')
-        if 'member' in text_lower:
-            actors.add('member')
-        if 'librarian' in text_lower:
-            actors.add('librarian')
-        if 'administrator' in text_lower or 'admin' in text_lower:
+        actors = {actor for actor in _VALID_ACTORS if actor in text_lower}
+        if 'admin' in text_lower:  # also true for every "administrator"
             actors.add('administrator')
-        if 'guest' in text_lower:
-            actors.add('guest')
             
-        return sorted(list(actors))
+        return sorted(actors)
 
     def extract_sentences_comprehensive(self, text: str) -> List[str]:
         """Extract all meaningful sentences from text with maximum coverage"""
-        sentences = []
-        
-        # Primary split by periods, exclamation marks, and question marks
-        period_splits = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|\!)\s+', text)
-        
-        for sentence in period_splits:
-            sentence = sentence.strip()
-            if len(sentence) > 3:  # Very low threshold for maximum coverage
-                sentences.append(sentence)
-        
-        # Enhanced processing for additional sentence extraction
+        # Primary split by periods, exclamation marks, and question marks.
+        # Length and content filtering happens once at the end, see _is_meaningful_sentence
         enhanced_sentences = []
-        for sentence in sentences:
+        for sentence in self._split_sentence_boundaries(text):
+            sentence = sentence.strip()
             enhanced_sentences.append(sentence)
             
             # Split by semicolons
             if ';' in sentence:
-                semi_splits = [s.strip() for s in sentence.split(';') if s.strip() and len(s.strip()) > 3]
-                enhanced_sentences.extend(semi_splits)
+                enhanced_sentences.extend(s.strip() for s in sentence.split(';'))
+            
+            sentence_lower = sentence.lower()
             
             # Aggressive compound sentence splitting with 'and'
-            if ' and ' in sentence.lower():
+            if ' and ' in sentence_lower:
                 # Look for action verbs that indicate separate requirements
-                action_verbs = ['clicks', 'enters', 'displays', 'shows', 'checks', 'validates', 
-                               'asks', 'opens', 'closes', 'selects', 'returns', 'issues', 'reserves',
-                               'adds', 'removes', 'updates', 'stores', 'retrieves', 'prompts']
-                
-                if any(verb in sentence.lower() for verb in action_verbs):
-                    and_parts = sentence.split(' and ')
-                    current_subject = None
+                if _COMPOUND_VERB_RE.search(sentence_lower):
+                    and_parts = _AND_SPLIT_RE.split(sentence)
                     
                     # Extract subject from first part
-                    first_part = and_parts[0].lower()
-                    if 'system' in first_part:
-                        current_subject = 'The system'
-                    elif 'member' in first_part:
-                        current_subject = 'The member'
-                    elif 'user' in first_part:
-                        current_subject = 'The user'
-                    elif 'librarian' in first_part:
-                        current_subject = 'The librarian'
-                    elif 'administrator' in first_part:
-                        current_subject = 'The administrator'
-                    elif 'guest' in first_part:
-                        current_subject = 'The guest'
+                    subject_match = min(_SUBJECT_RE.finditer(and_parts[0].lower()),
+                                        key=lambda match: _SUBJECT_RANK[match.group(1)], default=None)
+                    current_subject = f"The {subject_match.group(1)}" if subject_match else None
                     
                     for i, part in enumerate(and_parts):
                         part = part.strip()
+                        # Checked before prefixing so short fragments are not padded into sentences
                         if len(part) > 3:
                             if i == 0:
                                 enhanced_sentences.append(part)
@@ -151,343 +214,210 @@ class FixedRUPPProcessor:
                                 enhanced_sentences.append(part)
             
             # Split complex sentences with multiple clauses
-            if ' then ' in sentence.lower():
-                then_parts = sentence.split(' then ')
-                for part in then_parts:
-                    part = part.strip()
-                    if len(part) > 3:
-                        enhanced_sentences.append(part)
+            if ' then ' in sentence_lower:
+                enhanced_sentences.extend(part.strip() for part in sentence.split(' then '))
         
-        # Remove duplicates while preserving order
-        unique_sentences = list(dict.fromkeys(enhanced_sentences))
-        
-        # Final filtering with very permissive criteria
-        final_sentences = []
-        for sentence in unique_sentences:
-            sentence = sentence.strip()
-            if (len(sentence) > 3 and  # Minimum viable length
-                not sentence.isdigit() and 
-                any(char.isalpha() for char in sentence) and
-                # More comprehensive filtering
-                not any(skip_phrase in sentence.lower() for skip_phrase in [
-                    'the details include', 'details include', 'include the total',
-                    'total number of', 'date of issue', 'return date', 'fine to be paid'
-                ])):
-                final_sentences.append(sentence)
-        
-        return final_sentences
+        # Remove duplicates while preserving order, then apply the permissive final filter
+        return [sentence for sentence in dict.fromkeys(enhanced_sentences)
+                if self._is_meaningful_sentence(sentence)]
 
-    def apply_rupp_templates_enhanced(self, sentence: str, actors: List[str]) -> List[str]:
-        """Apply enhanced RUPP templates to generate multiple requirements"""
-        requirements = []
-        sentence = sentence.strip()
-        sentence_lower = sentence.lower()
-        
+    def _is_meaningful_sentence(self, sentence: str) -> bool:
+        """Very permissive filter for candidate sentences (expects stripped text)"""
+        return (len(sentence) > 3 and  # Minimum viable length
+                not sentence.isdigit() and
+                any(map(str.isalpha, sentence)) and  # C-level scan for a letter
+                not _SKIP_PHRASE_RE.search(sentence.lower()))
+
+    def _match_template_category(self, sentence: str, sentence_lower: str, actors: List[str]) -> str:
+        """Pick the template for a sentence, following the template priority order"""
         # Template 1: Conditional statements (If-then)
         if 'if' in sentence_lower and ('then' in sentence_lower or ',' in sentence):
-            req = self.process_conditional_template(sentence)
-            if req:
-                requirements.append(req)
-        
+            return 'conditional'
         # Template 2: When statements
-        elif sentence_lower.startswith('when '):
-            req = self.process_when_template(sentence)
-            if req:
-                requirements.append(req)
-        
-        # Template 3: System capabilities (more aggressive detection)
-        elif any(verb in sentence_lower for verb in ['display', 'show', 'validate', 'process', 'store', 'retrieve', 
-                                                    'calculate', 'generate', 'check', 'ask', 'prompt', 'open', 
-                                                    'close', 'update', 'enter', 'select']):
-            req = self.process_system_capability_template(sentence)
-            if req:
-                requirements.append(req)
-        
-        # Template 4: User actions (more comprehensive)
-        elif (any(actor in sentence_lower for actor in actors if actor != 'system') or
-              any(action in sentence_lower for action in ['click', 'enter', 'select', 'view', 'browse', 'search'])):
-            req = self.process_user_action_template(sentence, actors)
-            if req:
-                requirements.append(req)
-        
-        # Template 5: Modal statements
-        elif any(modal in sentence_lower for modal in ['should', 'must', 'can', 'will', 'shall', 'may']):
-            req = self.process_modal_template(sentence)
-            if req:
-                requirements.append(req)
+        if sentence_lower.startswith('when '):
+            return 'when'
         
-        # Template 6: Feature statements
-        elif any(feature in sentence_lower for feature in ['feature', 'function', 'capability', 'service']):
-            req = self.process_feature_template(sentence)
-            if req:
-                requirements.append(req)
-        
-        # Template 7: State/condition statements
-        elif any(state in sentence_lower for state in ['available', 'ready', 'logged in', 'valid', 'correct']):
-            req = self.process_state_template(sentence)
-            if req:
-                requirements.append(req)
-        
-        # Template 8: Data validation statements
-        elif any(validation in sentence_lower for validation in ['validate', 'check', 'verify', 'confirm']):
-            req = self.process_validation_template(sentence)
-            if req:
-                requirements.append(req)
+        # Templates 3-8: keyword driven, see _KEYWORD_TEMPLATES
+        for category, keywords in _KEYWORD_TEMPLATES:
+            if keywords.search(sentence_lower):
+                return category
+            # A mentioned actor also selects the user action template, below system capabilities
+            if category == 'capability' and _mentions_actor(sentence_lower, actors):
+                return 'user_action'
         
         # Default template if no specific template matches
-        else:
-            req = self.process_default_template(sentence, actors)
-            if req:
-                requirements.append(req)
+        return 'default'
+
+    def apply_rupp_templates_enhanced(self, sentence: str, actors: List[str]) -> List[str]:
+        """Apply enhanced RUPP templates to generate multiple requirements"""
+        req = _apply_template_cached(sentence.strip(), tuple(actors))
+        return [req] if req else []
+
+    def _apply_template(self, sentence: str, actors: Tuple[str, ...]) -> str:
+        """Fill the template for one stripped sentence"""
+        sentence_lower = sentence.lower()
         
-        return requirements
+        category = self._match_template_category(sentence, sentence_lower, actors)
+        return _TEMPLATE_HANDLERS[category](self, sentence, sentence_lower, actors)
 
-    def process_conditional_template(self, sentence: str) -> str:
+    def process_conditional_template(self, sentence: str, sentence_lower: str) -> str:
         """Process conditional if-then statements"""
-        try:
-            sentence_lower = sentence.lower()
-            if 'if' in sentence_lower and 'then' in sentence_lower:
-                parts = sentence_lower.split(' then ')
-                if_part = parts[0].replace('if', '').strip()
-                then_part = parts[1].strip()
+        if 'if' in sentence_lower and 'then' in sentence_lower:
+            # Only the first two pieces are used, so stop splitting after the second ' then '.
+            # 'then' only inside another word leaves nothing to split on
+            parts = sentence_lower.split(' then ', 2)
+            if len(parts) > 1:
+                return self._format_conditional(parts[0], parts[1])
                 
-                # Clean up the then part
-                then_part = re.sub(r'^(the )?system (shall|should|will|can)', '', then_part).strip()
-                then_part = re.sub(r'(the )?system', '', then_part).strip()
-                then_part = re.sub(r'^(asks?|shows?|displays?|checks?)', r'\1', then_part)
+        elif 'if' in sentence_lower and ',' in sentence:
+            # Condition comes from the lowered text, the consequence keeps its original case
+            return self._format_conditional(sentence_lower.partition(',')[0],
+                                            sentence.partition(',')[2])
                 
-                if then_part:
-                    return f"If {if_part}, then the system shall {then_part}."
-                else:
-                    return f"If {if_part}, then the system shall respond appropriately."
-                    
-            elif 'if' in sentence_lower and ',' in sentence:
-                parts = sentence.split(',')
-                if_part = parts[0].lower().replace('if', '').strip()
-                then_part = ','.join(parts[1:]).strip()
-                
-                # Clean up similar to above
-                then_part = re.sub(r'^(the )?system (shall|should|will|can)', '', then_part).strip()
-                then_part = re.sub(r'(the )?system', '', then_part).strip()
-                
-                if then_part:
-                    return f"If {if_part}, then the system shall {then_part}."
-                else:
-                    return f"If {if_part}, then the system shall respond appropriately."
-        except:
-            pass
         return f"The system shall handle the condition: {sentence}."
     
+    def _format_conditional(self, if_part: str, then_part: str) -> str:
+        """Shared tail of the conditional template: tidy both parts and fill in the template"""
+        if_part = if_part.replace('if', '').strip()
+        
+        # Drop the "the system shall" lead-in, the template adds its own
+        then_part = _SYSTEM_MODAL_PREFIX_RE.sub('', then_part.strip()).strip()
+        then_part = _SYSTEM_MENTION_RE.sub('', then_part).strip()
+        
+        if then_part:
+            return f"If {if_part}, then the system shall {then_part}."
+        return f"If {if_part}, then the system shall respond appropriately."
+    
     def process_when_template(self, sentence: str) -> str:
         """Process when statements"""
-        try:
-            when_part = sentence[5:].strip()  # Remove 'when '
-            return f"When {when_part}, the system shall be able to respond appropriately."
-        except:
-            return f"The system shall handle the scenario: {sentence}."
+        when_part = sentence[5:].strip()  # Remove 'when '
+        return f"When {when_part}, the system shall be able to respond appropriately."
     
-    def process_system_capability_template(self, sentence: str) -> str:
+    def process_system_capability_template(self, sentence: str, sentence_lower: str) -> str:
         """Process system capability statements with better text handling"""
-        action_verbs = {
-            'displays': 'display', 'display': 'display', 'shows': 'display', 'show': 'display',
-            'validates': 'validate', 'validate': 'validate', 'checks': 'validate', 'check': 'validate',
-            'processes': 'process', 'process': 'process', 'handles': 'process', 'handle': 'process',
-            'stores': 'store', 'store': 'store', 'saves': 'store', 'save': 'store',
-            'retrieves': 'retrieve', 'retrieve': 'retrieve', 'fetches': 'retrieve', 'fetch': 'retrieve',
-            'asks': 'ask', 'ask': 'ask', 'prompts': 'prompt', 'prompt': 'prompt',
-            'opens': 'open', 'open': 'open', 'closes': 'close', 'close': 'close',
-            'updates': 'update', 'update': 'update', 'enters': 'accept', 'enter': 'accept'
-        }
-        
-        sentence_lower = sentence.lower().strip()
-        
         # Clean up the sentence first
-        sentence_clean = re.sub(r'^the (system|member|user|librarian|administrator|guest)', '', sentence_lower).strip()
-        
-        for verb_variant, base_verb in action_verbs.items():
-            if verb_variant in sentence_clean:
-                try:
-                    # Find the verb and extract the object/complement
-                    verb_index = sentence_clean.find(verb_variant)
-                    after_verb = sentence_clean[verb_index + len(verb_variant):].strip()
-                    
-                    # Clean up common artifacts
-                    after_verb = re.sub(r'^(s\s|ing\s)', '', after_verb).strip()
-                    after_verb = re.sub(r'^\s*the\s+', 'the ', after_verb)
-                    
-                    # Handle specific cases
-                    if after_verb:
-                        if base_verb == 'ask' or base_verb == 'prompt':
-                            if 'to' not in after_verb:
-                                after_verb = f"the user to {after_verb}"
-                        elif base_verb == 'display':
-                            if not after_verb.startswith('the '):
-                                after_verb = f"the {after_verb}"
-                        elif base_verb == 'validate':
-                            if not after_verb.startswith('the ') and not after_verb.startswith('that '):
-                                after_verb = f"the {after_verb}"
-                        
-                        return f"The system shall be able to {base_verb} {after_verb}."
-                    else:
-                        return f"The system shall be able to {base_verb} the required information."
-                except:
-                    return f"The system shall be able to {base_verb} appropriately."
+        sentence_clean = _ACTOR_PREFIX_RE.sub('', sentence_lower).strip()
         
+        # The variant listed first in _ACTION_VERBS wins, at its first occurrence
+        for verb_variant, base_verb in _ACTION_VERBS.items():
+            if verb_variant not in sentence_clean:
+                continue
+            
+            # Extract the object/complement after the verb
+            verb_index = sentence_clean.find(verb_variant)
+            after_verb = sentence_clean[verb_index + len(verb_variant):].strip()
+            
+            # Clean up common artifacts
+            after_verb = _VERB_ARTIFACT_PREFIX_RE.sub('', after_verb).strip()
+            after_verb = _PADDED_THE_PREFIX_RE.sub('the ', after_verb)
+            
+            # Handle specific cases
+            if after_verb:
+                if base_verb == 'ask' or base_verb == 'prompt':
+                    if 'to' not in after_verb:
+                        after_verb = f"the user to {after_verb}"
+                elif base_verb == 'display':
+                    if not after_verb.startswith('the '):
+                        after_verb = f"the {after_verb}"
+                elif base_verb == 'validate':
+                    if not after_verb.startswith('the ') and not after_verb.startswith('that '):
+                        after_verb = f"the {after_verb}"
+                
+                return f"The system shall be able to {base_verb} {after_verb}."
+            else:
+                return f"The system shall be able to {base_verb} the required information."
+    
         # If no specific verb found, generate a general capability requirement
         return f"The system shall be able to {sentence_clean}."
     
-    def process_user_action_template(self, sentence: str, actors: List[str]) -> str:
+    def process_user_action_template(self, sentence: str, sentence_lower: str, actors: List[str]) -> str:
         """Process user action statements with improved text handling"""
-        sentence_lower = sentence.lower().strip()
-        
         # Clean up the sentence
-        sentence_clean = re.sub(r'^the\s+', '', sentence_lower)
+        sentence_clean = _THE_PREFIX_RE.sub('', sentence_lower)
         
         for actor in actors:
-            if actor != 'system' and actor in sentence_clean:
-                try:
-                    # Find the actor and extract the action
-                    actor_index = sentence_clean.find(actor)
-                    after_actor = sentence_clean[actor_index + len(actor):].strip()
+            if actor == 'system':
+                continue
+            # Find the actor and extract the action
+            actor_index = sentence_clean.find(actor)
+            if actor_index != -1:
+                after_actor = sentence_clean[actor_index + len(actor):].strip()
+                
+                # Clean up common connecting words and artifacts
+                after_actor = _MODAL_PREFIX_RE.sub('', after_actor)
+                after_actor = _USER_VERB_PREFIX_RE.sub(r'\1 ', after_actor)
+                
+                # Handle specific action patterns
+                if after_actor:
+                    # Fix common patterns
+                    if after_actor.startswith('on '):
+                        after_actor = after_actor[3:].strip()
                     
-                    # Clean up common connecting words and artifacts
-                    after_actor = re.sub(r'^(can|will|should|must|may)\s+', '', after_actor)
-                    after_actor = re.sub(r'^(clicks?|click)\s+', 'click ', after_actor)
-                    after_actor = re.sub(r'^(enters?|enter)\s+', 'enter ', after_actor)
-                    after_actor = re.sub(r'^(selects?|select)\s+', 'select ', after_actor)
-                    after_actor = re.sub(r'^(types?|type)\s+', 'type ', after_actor)
-                    after_actor = re.sub(r'^(views?|view)\s+', 'view ', after_actor)
-                    after_actor = re.sub(r'^(browses?|browse)\s+', 'browse ', after_actor)
+                    # Ensure proper article usage
+                    if not after_actor.startswith(('the ', 'a ', 'an ', 'their ', 'his ', 'her ')):
+                        if any(word in after_actor for word in _ARTICLE_NOUNS):
+                            after_actor = f"the {after_actor}"
                     
-                    # Handle specific action patterns
-                    if after_actor:
-                        # Fix common patterns
-                        if after_actor.startswith('on '):
-                            after_actor = after_actor[3:].strip()
-                        
-                        # Ensure proper article usage
-                        if not after_actor.startswith(('the ', 'a ', 'an ', 'their ', 'his ', 'her ')):
-                            if any(word in after_actor for word in ['button', 'page', 'details', 'information', 'books']):
-                                after_actor = f"the {after_actor}"
-                        
-                        return f"The system shall provide {actor} with the ability to {after_actor}."
-                    else:
-                        return f"The system shall provide {actor} with the required functionality."
-                except:
-                    return f"The system shall provide {actor} with the ability to perform the action."
+                    return f"The system shall provide {actor} with the ability to {after_actor}."
+                else:
+                    return f"The system shall provide {actor} with the required functionality."
         
         # If no specific actor found, use generic user
-        action = re.sub(r'^(the\s+)?(system\s+)?', '', sentence_clean).strip()
+        action = _THE_SYSTEM_PREFIX_RE.sub('', sentence_clean).strip()
         if action:
             return f"The system shall provide users with the ability to {action}."
         else:
             return f"The system shall provide users with the required functionality."
     
-    def process_modal_template(self, sentence: str) -> str:
+    def process_modal_template(self, sentence: str, sentence_lower: str) -> str:
         """Process modal verb statements"""
-        modals = ['should', 'must', 'can', 'will', 'shall', 'may', 'could', 'would']
-        sentence_lower = sentence.lower()
+        for modal in _MODALS:
+            modal_index = sentence_lower.find(modal)
+            if modal_index != -1:
+                after_modal = sentence[modal_index + len(modal):].strip()
+                return f"The system shall {after_modal}."
         
-        for modal in modals:
-            if modal in sentence_lower:
-                try:
-                    modal_index = sentence_lower.find(modal)
-                    after_modal = sentence[modal_index + len(modal):].strip()
-                    return f"The system shall {after_modal}."
-                except:
-                    pass
-        
-        return f"The system shall be able to {sentence.lower()}."
+        return f"The system shall be able to {sentence_lower}."
     
-    def process_feature_template(self, sentence: str) -> str:
+    def process_feature_template(self, sentence: str, sentence_lower: str) -> str:
         """Process feature/function statements"""
-        feature_words = ['feature', 'function', 'capability', 'service', 'interface', 'component']
-        sentence_lower = sentence.lower()
-        
-        for feature_word in feature_words:
+        for feature_word in _FEATURE_WORDS:
             if feature_word in sentence_lower:
                 return f"The system shall provide the {feature_word} described as: {sentence}."
         
         return f"The system shall implement: {sentence}."
     
-    def process_state_template(self, sentence: str) -> str:
+    def process_state_template(self, sentence: str, sentence_lower: str) -> str:
         """Process state/condition statements"""
-        state_words = ['available', 'ready', 'logged in', 'valid', 'correct', 'stored', 'retrieved']
-        sentence_lower = sentence.lower()
-        
-        for state_word in state_words:
+        for state_word in _STATE_WORDS:
             if state_word in sentence_lower:
-                return f"The system shall ensure that {sentence.lower()}."
+                return f"The system shall ensure that {sentence_lower}."
         
         return f"The system shall maintain the state: {sentence}."
     
-    def process_validation_template(self, sentence: str) -> str:
+    def process_validation_template(self, sentence: str, sentence_lower: str) -> str:
         """Process data validation statements"""
-        validation_words = ['validate', 'check', 'verify', 'confirm', 'authenticate']
-        sentence_lower = sentence.lower()
-        
-        for validation_word in validation_words:
+        for validation_word in _VALIDATION_WORDS:
             if validation_word in sentence_lower:
                 return f"The system shall {validation_word} {sentence_lower.replace(validation_word, '').strip()}."
         
         return f"The system shall validate: {sentence}."
     
-    def process_default_template(self, sentence: str, actors: List[str]) -> str:
+    def process_default_template(self, sentence: str, sentence_lower: str, actors: List[str]) -> str:
         """Default template for unmatched sentences"""
-        if any(actor in sentence.lower() for actor in actors if actor != 'system'):
+        if _mentions_actor(sentence_lower, actors):
             return f"The system shall support the requirement: {sentence}."
         else:
-            return f"The system shall be able to {sentence.lower()}."
+            return f"The system shall be able to {sentence_lower}."
 
     def generate_snl_from_text(self, description: str) -> Dict[str, Any]:
         """
         Generate SNL from natural language description using enhanced RUPP methodology
         """
         try:
-            # Step 1: Preprocess the text
-            preprocessed_text = self.apply_preprocessing(description)
-            
-            # Step 2: Extract sentences with enhanced coverage
-            sentences = self.extract_sentences_comprehensive(preprocessed_text)
-            
-            # Step 3: Identify actors
-            actors = self.identify_actors_enhanced(description)
-            
-            # Step 4: Generate requirements using enhanced templates
-            all_requirements = []
-            
-            for sentence in sentences:
-                if len(sentence.strip()) > 3:  # Process meaningful sentences
-                    sentence_requirements = self.apply_rupp_templates_enhanced(sentence, actors)
-                    all_requirements.extend(sentence_requirements)
-            
-            # Step 5: Clean up and deduplicate requirements
-            cleaned_requirements = []
-            seen_requirements = set()
-            
-            for req in all_requirements:
-                if req and req not in seen_requirements and len(req) > 20:
-                    cleaned_requirements.append(req)
-                    seen_requirements.add(req)
-            
-            # Step 6: Create final SNL text
-            final_snl = '\n'.join(cleaned_requirements)
-            
-            return {
-                'snl_text': final_snl,
-                'actors': actors,
-                'preprocessed_text': preprocessed_text,
-                'sentences_count': len(cleaned_requirements),
-                'formatted_sentences': self.split_into_sentences(final_snl),
-                'requirements': cleaned_requirements,
-                'original_sentences_processed': len(sentences),
-                'processing_stats': {
-                    'total_input_sentences': len(sentences),
-                    'requirements_generated': len(all_requirements),
-                    'unique_requirements': len(cleaned_requirements),
-                    'actors_identified': len(actors)
-                }
-            }
+            # Successful results are cached per description, see _generate_snl_cached;
+            # hand out copies so callers can mutate them
+            return _copy_result(_generate_snl_cached(description))
             
         except Exception as e:
             return {
@@ -499,3 +429,58 @@ class FixedRUPPProcessor:
                 'requirements': [],
                 'error': str(e)
             }
+
+    def _run_snl_pipeline(self, description: str) -> Dict[str, Any]:
+        """Run the full pipeline for one description; errors propagate to the caller"""
+        # Step 1: Preprocess the text
+        preprocessed_text = self.apply_preprocessing(description)
+        
+        # Step 2: Extract sentences with enhanced coverage
+        sentences = self.extract_sentences_comprehensive(preprocessed_text)
+        
+        # Step 3: Identify actors
+        actors = self.identify_actors_enhanced(description)
+        
+        # Step 4: Generate requirements using enhanced templates
+        all_requirements = []
+        
+        # Extracted sentences are already stripped and longer than 3 characters
+        for sentence in sentences:
+            all_requirements.extend(self.apply_rupp_templates_enhanced(sentence, actors))
+        
+        # Step 5: Clean up and deduplicate requirements
+        cleaned_requirements = [req for req in dict.fromkeys(all_requirements)
+                                if req and len(req) > 20]
+        
+        # Step 6: Create final SNL text
+        final_snl = '\n'.join(cleaned_requirements)
+        
+        return {
+            'snl_text': final_snl,
+            'actors': actors,
+            'preprocessed_text': preprocessed_text,
+            'sentences_count': len(cleaned_requirements),
+            'formatted_sentences': self.split_into_sentences(final_snl),
+            'requirements': cleaned_requirements,
+            'original_sentences_processed': len(sentences),
+            'processing_stats': {
+                'total_input_sentences': len(sentences),
+                'requirements_generated': len(all_requirements),
+                'unique_requirements': len(cleaned_requirements),
+                'actors_identified': len(actors)
+            }
+        }
+
+# The module-level caches always run on this shared instance, not on the processor that
+# called them, so subclass overrides of _apply_template or _run_snl_pipeline are ignored
+_PROCESSOR = FixedRUPPProcessor()
+
+@lru_cache(maxsize=4096)
+def _apply_template_cached(sentence: str, actors: Tuple[str, ...]) -> str:
+    """Filled template for a stripped sentence, built by _PROCESSOR; stock phrases repeat across documents"""
+    return _PROCESSOR._apply_template(sentence, actors)
+
+@lru_cache(maxsize=512)
+def _generate_snl_cached(description: str) -> Dict[str, Any]:
+    """SNL result for a description, built by _PROCESSOR; exceptions are not cached and reach the caller"""
+    return _PROCESSOR._run_snl_pipeline(description)
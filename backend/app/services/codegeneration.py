@@ -8,6 +8,16 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Precompiled PlantUML declaration and member patterns
+_CLASS_DECLARATION_RE = re.compile(r'class\s+(\w+)(?:\s+\{)?')
+_INTERFACE_DECLARATION_RE = re.compile(r'interface\s+(\w+)(?:\s+\{)?')
+_ABSTRACT_CLASS_DECLARATION_RE = re.compile(r'abstract\s+class\s+(\w+)(?:\s+\{)?')
+_TYPED_MEMBER_RE = re.compile(r'\s*\w+\s+\w+')
+_NON_IDENTIFIER_CHARS_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+# PlantUML visibility markers (+ public, - private, # protected, ~ package), deleted in one pass
+_VISIBILITY_MARKERS = str.maketrans('', '', '+-#~')
+
 class CodeGenerationService:
     """
     Service for generating skeletal Java code from PlantUML class diagrams
@@ -75,7 +85,7 @@ class CodeGenerationService:
                 continue
             
             # Class declaration
-            class_match = re.match(r'class\s+(\w+)(?:\s+\{)?', line)
+            class_match = _CLASS_DECLARATION_RE.match(line)
             if class_match:
                 current_class = class_match.group(1)
                 classes[current_class] = {
@@ -89,7 +99,7 @@ class CodeGenerationService:
                 continue
             
             # Interface declaration
-            interface_match = re.match(r'interface\s+(\w+)(?:\s+\{)?', line)
+            interface_match = _INTERFACE_DECLARATION_RE.match(line)
             if interface_match:
                 current_class = interface_match.group(1)
                 classes[current_class] = {
@@ -104,7 +114,7 @@ class CodeGenerationService:
             
             # Abstract class
             if 'abstract class' in line:
-                abstract_match = re.match(r'abstract\s+class\s+(\w+)(?:\s+\{)?', line)
+                abstract_match = _ABSTRACT_CLASS_DECLARATION_RE.match(line)
                 if abstract_match:
                     current_class = abstract_match.group(1)
                     classes[current_class] = {
@@ -176,7 +186,7 @@ class CodeGenerationService:
         """Check if line represents an attribute"""
         # Simple heuristic: starts with visibility modifier and doesn't contain ()
         return (line.startswith(('+', '-', '#', '~')) or 
-                re.match(r'\s*\w+\s+\w+', line)) and '(' not in line
+                _TYPED_MEMBER_RE.match(line)) and '(' not in line
     
     def _is_method(self, line: str) -> bool:
         """Check if line represents a method"""
@@ -186,7 +196,7 @@ class CodeGenerationService:
         """Parse attribute from PlantUML line"""
         try:
             # Remove visibility symbols
-            clean_line = line.replace('+', '').replace('-', '').replace('#', '').replace('~', '').strip()
+            clean_line = line.translate(_VISIBILITY_MARKERS).strip()
             
             # Pattern: type name or name : type
             if ':' in clean_line:
@@ -219,7 +229,7 @@ class CodeGenerationService:
         """Parse method from PlantUML line"""
         try:
             # Remove visibility symbols
-            clean_line = line.replace('+', '').replace('-', '').replace('#', '').replace('~', '').strip()
+            clean_line = line.translate(_VISIBILITY_MARKERS).strip()
             
             # Extract method name and parameters
             if '(' in clean_line and ')' in clean_line:
@@ -326,7 +336,7 @@ class CodeGenerationService:
     def _sanitize_name(self, name: str) -> str:
         """Sanitize name to be valid Java identifier"""
         # Remove special characters and spaces
-        name = re.sub(r'[^a-zA-Z0-9_]', '', name)
+        name = _NON_IDENTIFIER_CHARS_RE.sub('', name)
         
         # Ensure doesn't start with number
         if name and name[0].isdigit():
@@ -455,7 +465,7 @@ class CodeGenerationService:
                 imports.add('java.util.List')
                 imports.add('java.util.ArrayList')
         
-        return sorted(list(imports))
+        return sorted(imports)
     
     def _generate_class_declaration(self, class_name: str, class_info: Dict) -> str:
         """Generate class declaration line"""
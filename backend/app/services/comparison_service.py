@@ -7,6 +7,11 @@ from typing import Dict, Any, List, Tuple
 from sklearn.metrics import precision_score, recall_score, f1_score
 import re
 
+# Sentence boundary after '.' or '?', skipping initialisms ("e.g.") and titles ("Mr.").
+# Matching the whitespace first lets most positions fail before any lookbehind runs.
+_SENTENCE_SPLIT_RE = re.compile(r'\s(?<=[.?]\s)(?<!\w\.\w.\s)(?<![A-Z][a-z]\.\s)')
+_NUMBERING_RE = re.compile(r'^\d+\.\s*')
+
 class ComparisonService:
     def __init__(self):
         self.similarity_threshold = 0.3  # Lowered from 0.5 to 0.3 for better categorization
@@ -77,14 +82,14 @@ class ComparisonService:
         """
         try:
             # Split by sentences and clean up
-            sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', snl_text)
+            sentences = _SENTENCE_SPLIT_RE.split(snl_text)
             
             requirements = []
             for sentence in sentences:
                 sentence = sentence.strip()
                 
                 # Remove numbering if present
-                sentence = re.sub(r'^\d+\.\s*', '', sentence)
+                sentence = _NUMBERING_RE.sub('', sentence)
                 
                 # Clean up and filter
                 if sentence and len(sentence) > 10:  # Filter out very short sentences
@@ -10,11 +10,50 @@ from typing import Dict, Any, List
 from dotenv import load_dotenv
 import re
 
+from app.services.spacy_loader import get_nlp
+
 load_dotenv()
 
 # Configure logging for the module
 logger = logging.getLogger(__name__)
 
+# Precompiled PlantUML patterns shared by the diagram post-processing passes
+_CLASS_NAME_RE = re.compile(r'class\s+(\w+)')
+_BARE_CLASS_LINE_RE = re.compile(r'^\s*class\s+\w+\s*$')
+_PARTICIPANT_PATTERNS = (
+    re.compile(r'actor\s+(\w+)'),
+    re.compile(r'participant\s+(\w+)'),
+    re.compile(r'participant\s+"([^"]+)"\s+as\s+(\w+)'),
+    re.compile(r'actor\s+"([^"]+)"\s+as\s+(\w+)'),
+)
+_MESSAGE_RE = re.compile(r'(\w+)\s*-[->]+\s*(\w+)')
+_MALFORMED_ARROW_RE = re.compile(r'^\s*[-<]+>+\s*$', re.MULTILINE)
+_WORD_SEPARATOR_RE = re.compile(r'[\s_-]+')
+
+# Generic element names and the specific names used in their place
+_GENERIC_REPLACEMENTS = {
+    'System': 'MainSystem',
+    'Database': 'DataStore',
+    'Application': 'AppCore'
+}
+_GENERIC_REFERENCE_RE = re.compile(r'\b(?:' + '|'.join(_GENERIC_REPLACEMENTS) + r')\b')
+# Message fixes, applied in order: "Generic ->" first, then "-> Generic"
+_GENERIC_MESSAGE_FIXES = tuple(
+    (pattern, replacement)
+    for generic, specific in _GENERIC_REPLACEMENTS.items()
+    for pattern, replacement in ((re.compile(r'\b' + generic + r'\s*->'), specific + ' ->'),
+                                 (re.compile(r'->\s*' + generic + r'\b'), '-> ' + specific))
+)
+
+# Only POS tags and lemmas are read here, so entity recognition is skipped per call
+_UNUSED_PIPES = ('ner',)
+
+# Generic placeholder elements dropped from generated diagrams (matched on lowercase lines)
+_GENERIC_CLASS_DECLARATIONS = ('class system', 'class database', 'class application')
+_GENERIC_PARTICIPANT_DECLARATIONS = ('participant system', 'actor system')
+# Role words that mark an actor as a human user
+_HUMAN_ACTOR_INDICATORS = ('user', 'admin', 'customer', 'client', 'manager', 'staff', 'librarian', 'student')
+
 class DiagramService:
     def __init__(self):
         self.client = openai.AsyncOpenAI(
@@ -22,12 +61,8 @@ class DiagramService:
         )
         self.model = os.getenv("OPENAI_MODEL", "gpt-4.1")
         
-        # Initialize spaCy for NLP processing
-        try:
-            import spacy
-            self.nlp = spacy.load('en_core_web_sm')
-        except (ImportError, OSError):
-            self.nlp = None
+        # Shared spaCy pipeline (None when spaCy is unavailable)
+        self.nlp = get_nlp()
     
     async def generate_class_diagram(self, snl_data: Dict[str, Any]) -> str:
         """
@@ -453,16 +488,22 @@ User --> System : uses
         Extract methods for an actor class from requirements
         """
         methods = []
+        actor_lower = actor.lower()
+        actor_requirements = [req for req in requirements if actor_lower in req.lower()]
+        # Nothing to parse, or no spaCy pipeline to parse it with
+        if not actor_requirements or self.nlp is None:
+            return methods
         
-        for req in requirements:
-            if actor.lower() in req.lower():
-                # Extract verbs that might be methods
-                doc = self.nlp(req)
-                for token in doc:
-                    if token.pos_ == "VERB" and token.lemma_ not in ['be', 'have', 'do', 'shall', 'provide']:
-                        method_name = f'+{token.lemma_}()'
-                        if method_name not in methods:
-                            methods.append(method_name)
+        # Extract verbs that might be methods, parsing the requirements in one batch
+        for doc in self.nlp.pipe(actor_requirements, disable=_UNUSED_PIPES):
+            for token in doc:
+                if token.pos_ != "VERB":
+                    continue
+                lemma = token.lemma_
+                if lemma not in ('be', 'have', 'do', 'shall', 'provide'):
+                    method_name = f'+{lemma}()'
+                    if method_name not in methods:
+                        methods.append(method_name)
         
         return methods[:5]  # Limit to 5 methods for readability
     
@@ -582,16 +623,17 @@ User --> System : uses
         Extract interactions for sequence diagram
         """
         interactions = []
+        # Nothing to parse, or no spaCy pipeline to parse it with
+        if not requirements or self.nlp is None:
+            return interactions
         
-        for req in requirements:
-            # Parse requirement to find actor-system interactions
-            doc = self.nlp(req)
-            
+        # Parse every requirement once, in one batch, to find actor-system interactions
+        for req, doc in zip(requirements, self.nlp.pipe(requirements, disable=_UNUSED_PIPES)):
             # Look for patterns like "Actor does something" -> "System responds"
             for actor in actors:
                 if actor.lower() in req.lower():
                     # Extract the action
-                    action = self._extract_action_from_requirement(req, actor)
+                    action = self._extract_action_from_requirement(req, actor, doc)
                     
                     if action:
                         interactions.append({
@@ -612,26 +654,30 @@ User --> System : uses
         
         return interactions
     
-    def _extract_action_from_requirement(self, requirement: str, actor: str) -> str:
+    def _extract_action_from_requirement(self, requirement: str, actor: str, doc=None) -> str:
         """
-        Extract action from requirement text
+        Extract action from requirement text (doc: the requirement, if already parsed)
         """
         try:
-            doc = self.nlp(requirement)
+            if doc is None:
+                doc = self.nlp(requirement, disable=_UNUSED_PIPES)
             
             # Look for verbs after the actor
+            actor_lower = actor.lower()
             actor_found = False
             action_parts = []
             
             for token in doc:
-                if actor.lower() in token.text.lower():
+                if actor_lower in token.lower_:
                     actor_found = True
-                elif actor_found and token.pos_ == "VERB":
-                    action_parts.append(token.lemma_)
-                elif actor_found and token.pos_ in ["NOUN", "ADJ"] and len(action_parts) > 0:
-                    action_parts.append(token.text)
-                elif actor_found and token.text in ['.', ',']:
-                    break
+                elif actor_found:
+                    pos = token.pos_
+                    if pos == "VERB":
+                        action_parts.append(token.lemma_)
+                    elif pos in ("NOUN", "ADJ") and len(action_parts) > 0:
+                        action_parts.append(token.text)
+                    elif token.text in ('.', ','):
+                        break
             
             return ' '.join(action_parts) if action_parts else 'perform action'
         
@@ -1610,7 +1656,7 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
             return False
 
         # Detect obviously malformed lines (e.g., lone arrows)
-        malformed_arrows = re.findall(r'^\s*[-<]+>+\s*$', diagram_code, re.MULTILINE)
+        malformed_arrows = _MALFORMED_ARROW_RE.findall(diagram_code)
         if malformed_arrows:
             return False
 
@@ -1698,13 +1744,8 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
                                 break
             
             # Reconstruct with proper PlantUML structure
-            result = "@startuml\n"
-            for line in fixed_lines:
-                if line.strip():
-                    result += line + "\n"
-            result += "@enduml"
-            
-            return result
+            body = [line for line in fixed_lines if line.strip()]
+            return '\n'.join(['@startuml', *body, '@enduml'])
             
         except Exception as e:
             print(f"Error validating class diagram: {str(e)}")
@@ -1717,29 +1758,31 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
         if not self.nlp:
             return {'nouns': [], 'verbs': [], 'proper_nouns': [], 'adjectives': []}
         
-        doc = self.nlp(text)
+        doc = self.nlp(text, disable=_UNUSED_PIPES)
+        # Collected as sets so duplicates never pile up
         entities = {
-            'nouns': [],
-            'verbs': [],
-            'proper_nouns': [],
-            'adjectives': []
+            'nouns': set(),
+            'verbs': set(),
+            'proper_nouns': set(),
+            'adjectives': set()
         }
         
         for token in doc:
-            if token.pos_ == 'NOUN' and len(token.text) > 2:
-                entities['nouns'].append(token.lemma_.lower())
-            elif token.pos_ == 'PROPN' and len(token.text) > 2:
-                entities['proper_nouns'].append(token.text)
-            elif token.pos_ == 'VERB' and token.lemma_ not in ['be', 'have', 'do']:
-                entities['verbs'].append(token.lemma_.lower())
-            elif token.pos_ == 'ADJ' and len(token.text) > 2:
-                entities['adjectives'].append(token.lemma_.lower())
-        
-        # Remove duplicates and filter relevant entities
-        for key in entities:
-            entities[key] = list(set(entities[key]))
-            
-        return entities
+            # Read each token attribute once; every access builds a new Python string
+            pos = token.pos_
+            long_enough = len(token) > 2
+            if pos == 'NOUN' and long_enough:
+                entities['nouns'].add(token.lemma_.lower())
+            elif pos == 'PROPN' and long_enough:
+                entities['proper_nouns'].add(token.text)
+            elif pos == 'VERB':
+                lemma = token.lemma_
+                if lemma not in ('be', 'have', 'do'):
+                    entities['verbs'].add(lemma.lower())
+            elif pos == 'ADJ' and long_enough:
+                entities['adjectives'].add(token.lemma_.lower())
+        
+        return {key: list(values) for key, values in entities.items()}
     
     
 
@@ -1753,21 +1796,22 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
             existing_classes = set()
             
             # Extract existing class names from the diagram
-            class_pattern = r'class\s+(\w+)'
             for line in lines:
-                match = re.search(class_pattern, line)
+                match = _CLASS_NAME_RE.search(line)
                 if match:
                     existing_classes.add(match.group(1))
             
             # Process each line
             for line in lines:
                 # Skip empty lines and comments
-                if not line.strip() or line.strip().startswith("'"):
+                stripped = line.strip()
+                if not stripped or stripped.startswith("'"):
                     processed_lines.append(line)
                     continue
                     
-                # Remove generic system classes
-                if any(generic in line.lower() for generic in ['class system', 'class database', 'class application']):
+                # Remove generic system classes (lowercase the line once, not per phrase)
+                line_lower = line.lower()
+                if any(generic in line_lower for generic in _GENERIC_CLASS_DECLARATIONS):
                     continue
                     
                 # Fix generic references in relationships
@@ -1816,16 +1860,10 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
             declared_participants = set()
             
             # Extract existing participants
-            participant_patterns = [
-                r'actor\s+(\w+)',
-                r'participant\s+(\w+)',
-                r'participant\s+"([^"]+)"\s+as\s+(\w+)',
-                r'actor\s+"([^"]+)"\s+as\s+(\w+)'
-            ]
             
             for line in lines:
-                for pattern in participant_patterns:
-                    matches = re.findall(pattern, line)
+                for pattern in _PARTICIPANT_PATTERNS:
+                    matches = pattern.findall(line)
                     for match in matches:
                         if isinstance(match, tuple):
                             declared_participants.add(match[-1])  # Get the alias
@@ -1835,12 +1873,14 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
             # Process each line
             for line in lines:
                 # Skip empty lines and comments
-                if not line.strip() or line.strip().startswith("'"):
+                stripped = line.strip()
+                if not stripped or stripped.startswith("'"):
                     processed_lines.append(line)
                     continue
                 
-                # Remove generic system participants
-                if any(generic in line.lower() for generic in ['participant system', 'actor system']):
+                # Remove generic system participants (lowercase the line once, not per phrase)
+                line_lower = line.lower()
+                if any(generic in line_lower for generic in _GENERIC_PARTICIPANT_DECLARATIONS):
                     continue
                 
                 # Fix generic references in messages
@@ -1884,37 +1924,22 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
 
     def _fix_generic_references(self, line: str) -> str:
         """Fix generic references in class diagram relationships"""
-        # Replace generic system references
-        replacements = {
-            'System': 'MainSystem',
-            'Database': 'DataStore',
-            'Application': 'AppCore'
-        }
-        
-        for generic, replacement in replacements.items():
-            line = re.sub(r'\b' + generic + r'\b', replacement, line)
-        
-        return line
+        # Replace generic system references; no replacement contains another generic
+        # name on a word boundary, so one pass gives the same result as one sub per name
+        return _GENERIC_REFERENCE_RE.sub(lambda match: _GENERIC_REPLACEMENTS[match.group(0)], line)
 
     def _fix_generic_message_references(self, line: str) -> str:
         """Fix generic references in sequence diagram messages"""
         # Replace generic system references in messages
-        replacements = {
-            'System': 'MainSystem',
-            'Database': 'DataStore',
-            'Application': 'AppCore'
-        }
-        
-        for generic, replacement in replacements.items():
-            line = re.sub(r'\b' + generic + r'\s*->', replacement + ' ->', line)
-            line = re.sub(r'->\s*' + generic + r'\b', '-> ' + replacement, line)
+        for pattern, replacement in _GENERIC_MESSAGE_FIXES:
+            line = pattern.sub(replacement, line)
         
         return line
 
     def _to_pascal_case(self, text: str) -> str:
         """Convert text to PascalCase"""
         # Handle common actor names
-        words = re.split(r'[\s_-]+', text.strip())
+        words = _WORD_SEPARATOR_RE.split(text.strip())
         return ''.join(word.capitalize() for word in words if word)
 
     def _generate_class_definition(self, class_name: str) -> str:
@@ -1922,22 +1947,14 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
         # Generate realistic attributes and methods based on class name
         attributes, methods = self._get_class_members(class_name)
         
-        definition = f"class {class_name} {{\n"
-        
-        # Add attributes
-        for attr in attributes:
-            definition += f"  {attr}\n"
-        
-        # Add separator
-        definition += "  --\n"
+        # Attributes, a separator, then methods, built as lines and joined once
+        lines = [f"class {class_name} {{"]
+        lines.extend(f"  {attr}" for attr in attributes)
+        lines.append("  --")
+        lines.extend(f"  {method}" for method in methods)
+        lines.append("}")
         
-        # Add methods
-        for method in methods:
-            definition += f"  {method}\n"
-        
-        definition += "}"
-        
-        return definition
+        return '\n'.join(lines)
 
     def _get_class_members(self, class_name: str) -> tuple:
         """Get appropriate attributes and methods for a class based on its name"""
@@ -1979,8 +1996,8 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
             line = lines[i]
             
             # Check if this is a simple class declaration without body
-            if re.match(r'^\s*class\s+\w+\s*$', line):
-                class_name = re.search(r'class\s+(\w+)', line).group(1)
+            if _BARE_CLASS_LINE_RE.match(line):
+                class_name = _CLASS_NAME_RE.search(line).group(1)
                 # Replace with full class definition
                 full_definition = self._generate_class_definition(class_name)
                 processed_lines.append(full_definition)
@@ -1993,8 +2010,8 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
 
     def _is_human_actor(self, actor: str) -> bool:
         """Determine if an actor represents a human role"""
-        human_indicators = ['user', 'admin', 'customer', 'client', 'manager', 'staff', 'librarian', 'student']
-        return any(indicator in actor.lower() for indicator in human_indicators)
+        actor_lower = actor.lower()
+        return any(indicator in actor_lower for indicator in _HUMAN_ACTOR_INDICATORS)
 
     def _ensure_participant_usage(self, diagram: str, identified_actors: List[str]) -> str:
         """Ensure all participants are used in at least one message"""
@@ -2002,16 +2019,10 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
         
         # Find all declared participants
         declared_participants = set()
-        participant_patterns = [
-            r'actor\s+(\w+)',
-            r'participant\s+(\w+)',
-            r'participant\s+"([^"]+)"\s+as\s+(\w+)',
-            r'actor\s+"([^"]+)"\s+as\s+(\w+)'
-        ]
         
         for line in lines:
-            for pattern in participant_patterns:
-                matches = re.findall(pattern, line)
+            for pattern in _PARTICIPANT_PATTERNS:
+                matches = pattern.findall(line)
                 for match in matches:
                     if isinstance(match, tuple):
                         declared_participants.add(match[-1])
@@ -2020,10 +2031,9 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
         
         # Find participants used in messages
         used_participants = set()
-        message_pattern = r'(\w+)\s*-[->]+\s*(\w+)'
         
         for line in lines:
-            matches = re.findall(message_pattern, line)
+            matches = _MESSAGE_RE.findall(line)
             for match in matches:
                 used_participants.add(match[0])
                 used_participants.add(match[1])
@@ -2067,16 +2077,10 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
             valid_lines = []
             
             # First pass: identify declared participants
-            participant_patterns = [
-                r'actor\s+(\w+)',
-                r'participant\s+(\w+)',
-                r'participant\s+"([^"]+)"\s+as\s+(\w+)',
-                r'actor\s+"([^"]+)"\s+as\s+(\w+)'
-            ]
             
             for line in lines:
-                for pattern in participant_patterns:
-                    matches = re.findall(pattern, line)
+                for pattern in _PARTICIPANT_PATTERNS:
+                    matches = pattern.findall(line)
                     for match in matches:
                         if isinstance(match, tuple):
                             declared_participants.add(match[-1])  # Get the alias
@@ -2084,10 +2088,9 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
                             declared_participants.add(match)
             
             # Second pass: identify referenced participants and validate messages
-            message_pattern = r'(\w+)\s*-[->]+\s*(\w+)'
             for line in lines:
                 if '->' in line or '-->' in line:
-                    matches = re.findall(message_pattern, line)
+                    matches = _MESSAGE_RE.findall(line)
                     for match in matches:
                         referenced_participants.add(match[0])
                         referenced_participants.add(match[1])
@@ -2104,7 +2107,7 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
                 # Check if the line has references to undeclared participants
                 has_undeclared = False
                 if '->' in line or '-->' in line:
-                    matches = re.findall(message_pattern, line)
+                    matches = _MESSAGE_RE.findall(line)
                     for match in matches:
                         if match[0] not in declared_participants or match[1] not in declared_participants:
                             print(f"Removing message with undeclared participant: {line}")
@@ -2133,13 +2136,8 @@ OUTPUT ONLY PlantUML code from @startuml to @enduml"""
                         valid_lines.insert(end_index + 2, f"{other} --> {unused}: responds")
             
             # Reconstruct with proper PlantUML structure
-            result = "@startuml\n"
-            for line in valid_lines:
-                if '@startuml' not in line and '@enduml' not in line:
-                    result += line + "\n"
-            result += "@enduml"
-            
-            return result
+            body = [line for line in valid_lines if '@startuml' not in line and '@enduml' not in line]
+            return '\n'.join(['@startuml', *body, '@enduml'])
             
         except Exception as e:
             print(f"Error validating sequence diagram: {str(e)}")
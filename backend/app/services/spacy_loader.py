@@ -0,0 +1,18 @@
+"""
+Shared spaCy pipeline for the services that need POS tags, lemmas and entities
+"""
+
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def get_nlp():
+    """
+    Load en_core_web_sm once per process and share it between services.
+    Returns None when spaCy or the model is not installed.
+    """
+    try:
+        import spacy
+        # Nothing reads the dependency parse, so skip the parser
+        return spacy.load('en_core_web_sm', disable=['parser'])
+    except (ImportError, OSError):
+        return None